@@ -1,37 +1,72 @@
-import signal
-
 import streamlit as st
 import numpy as np
-from scipy.integrate import odeint
-import matplotlib.pyplot as plt
-
-
-# Lotka-Volterra equations
-def lotka_volterra(y, t, alpha, beta, gamma, delta):
-    # y[0] - prey ; y[1] - predator
-    dxdt = alpha * y[0] - beta * y[0] * y[1]
-    dydt = delta * y[0] * y[1] - gamma * y[1]
-    return [dxdt, dydt]
-
-
-# Plot population dynamics
-def plot_population(t, solution, label_x='Time', label_y='Population', title='Population Dynamics'):
-    fig, ax = plt.subplots()
-    ax.plot(t, solution[:, 0], label='Prey (x)')
-    ax.plot(t, solution[:, 1], label='Predator (y)')
-    ax.set_xlabel(label_x)
-    ax.set_ylabel(label_y)
-    ax.legend()
+from matplotlib.figure import Figure
+
+import solver
+
+# Plotted points per unit of time, clamped to a range that stays smooth at
+# browser figure sizes; the solver output is drawn as-is, so N_PLOT_MAX also
+# bounds the points per line
+N_PLOT_PER_TIME, N_PLOT_MIN, N_PLOT_MAX = 4, 200, 400
+
+# Parameters in sidebar: (alpha, beta, gamma, delta, initial populations, chart stop)
+PRESETS = {
+    'default': (0.1, 0.1, 0.1, 0.1, (5, 10), 100),
+    'wolves_elk': (0.1, 0.02, 0.05, 0.01, (10, 10), 200),
+    'foxes_hares': (1.0, 0.2, 1.0, 0.1, (5, 10), 50),
+}
+
+
+# Number of points to sample over [0, t_end]
+def plot_points(t_end):
+    return min(N_PLOT_MAX, max(N_PLOT_MIN, int(t_end * N_PLOT_PER_TIME)))
+
+
+# Solve the model over the short and the full horizon, reusing the result on
+# reruns with unchanged parameters
+@st.cache_data
+def solve_lv(alpha, beta, gamma, delta, x0, y0, stop):
+    n, n2 = plot_points(15), plot_points(stop)
+    t, t2 = np.linspace(0, 15, n), np.linspace(0, stop, n2)
+    params = [(alpha, beta, gamma, delta)] * 2
+    solution, solution2 = solver.solve_batch(params, [(x0, y0)] * 2, (15, stop), (n, n2))
+    return t, solution, t2, solution2
+
+
+# Plot population dynamics; the figure is created once per session under key
+# and only its line data is updated on later reruns
+def plot_population(t, solution, key, label_x='Time', label_y='Population', title='Population Dynamics'):
+    if key not in st.session_state:
+        fig = Figure()
+        ax = fig.subplots()
+        prey_line, = ax.plot([], [], label='Prey (x)')
+        predator_line, = ax.plot([], [], label='Predator (y)')
+        ax.set_xlabel(label_x)
+        ax.set_ylabel(label_y)
+        ax.legend()
+        st.session_state[key] = (fig, ax, prey_line, predator_line)
+    fig, ax, prey_line, predator_line = st.session_state[key]
+    prey_line.set_data(t, solution[:, 0])
+    predator_line.set_data(t, solution[:, 1])
+    ax.relim()
+    ax.autoscale_view()
     ax.set_title(title)
     return fig
 
 
-# Phase diagram plot
-def plot_phase_diagram(solution, label_x='Prey (x)', label_y='Predator (y)', title='Phase Diagram'):
-    fig, ax = plt.subplots()
-    ax.plot(solution[:, 0], solution[:, 1])
-    ax.set_xlabel(label_x)
-    ax.set_ylabel(label_y)
+# Phase diagram plot; reused across reruns like plot_population
+def plot_phase_diagram(solution, key, label_x='Prey (x)', label_y='Predator (y)', title='Phase Diagram'):
+    if key not in st.session_state:
+        fig = Figure()
+        ax = fig.subplots()
+        line, = ax.plot([], [])
+        ax.set_xlabel(label_x)
+        ax.set_ylabel(label_y)
+        st.session_state[key] = (fig, ax, line)
+    fig, ax, line = st.session_state[key]
+    line.set_data(solution[:, 0], solution[:, 1])
+    ax.relim()
+    ax.autoscale_view()
     ax.set_title(title)
     return fig
 
@@ -74,22 +109,14 @@ def show_graphs():
     st.markdown("Model representation using charts.")
 
     st.sidebar.divider()
-    # Parameters in sidebar
-    alpha, beta, gamma, delta = 0.1, 0.1, 0.1, 0.1
-    initial_populations = [5, 10]
-    # Chart stop
-    stop = 100
-
     # Examples
     st.sidebar.header('Examples')
+    preset = 'default'
     if st.sidebar.button('Wolves vs Elk'):
-        alpha, beta, gamma, delta = 0.1, 0.02, 0.05, 0.01
-        initial_populations = [10, 10]
-        stop = 200
+        preset = 'wolves_elk'
     if st.sidebar.button('Foxes vs Hares'):
-        alpha, beta, gamma, delta = 1.0, 0.2, 1.0, 0.1
-        initial_populations = [5, 10]
-        stop = 50
+        preset = 'foxes_hares'
+    alpha, beta, gamma, delta, initial_populations, stop = PRESETS[preset]
 
     st.sidebar.divider()
     # Parameters
@@ -102,21 +129,17 @@ def show_graphs():
     # Initial populations
     initial_populations = st.sidebar.slider('Initial Populations (x, y)', min_value=1, max_value=20, value=initial_populations)
 
-    # Time points
-    t = np.linspace(0, 15, 1000)
-    t2 = np.linspace(0, stop, 1000)
-
     # Solve the differential equations
-    solution = odeint(lotka_volterra, initial_populations, t, args=(alpha, beta, gamma, delta))
-    solution2 = odeint(lotka_volterra, initial_populations, t2, args=(alpha, beta, gamma, delta))
+    x0, y0 = initial_populations
+    t, solution, t2, solution2 = solve_lv(alpha, beta, gamma, delta, x0, y0, stop)
 
     # Plotting
     # populations charts
-    fig1 = plot_population(t, solution)
-    fig2 = plot_population(t2, solution2, title=f'Population Dynamics x{stop}')
+    fig1 = plot_population(t, solution, 'fig1')
+    fig2 = plot_population(t2, solution2, 'fig2', title=f'Population Dynamics x{stop}')
 
     # phase diagram
-    fig3 = plot_phase_diagram(solution2)
+    fig3 = plot_phase_diagram(solution2, 'fig3')
 
     # Display the plots
     st.pyplot(fig1)